@@ -7,7 +7,7 @@
 # This file is used to define the PyAutomation class which is the main class of the
 # PyAutomation package. The PyAutomation class is used to control the Aerotech
 # controller and the PSO modules. The class is used to load and run trajectories
-# on the PSO modules.
+# on the PSO modules, guarded by an abort watchdog running on its own thread.
 # ----------------------------------------------------------------------------------
 # Author: Christofanis Skordas
 #
@@ -32,18 +32,22 @@
 # SOFTWARE.
 # ----------------------------------------------------------------------------------
 
+from __future__ import annotations
+
 import time
 from dataclasses import dataclass, field
 from functools import wraps
 from math import ceil
-from typing import Any, Callable
+from typing import Any, Callable, TYPE_CHECKING
 
-from automation1 import PsoDistanceInput, PsoWindowInput, PsoOutputPin
+from pyautomation import controller, modules, utils, watchdog
 
-from pyautomation import controller, modules, utils
+if TYPE_CHECKING:
+    # The automation1 SDK is slow to import, it is only loaded once a controller is used
+    from automation1 import PsoDistanceInput, PsoWindowInput, PsoOutputPin
 
 
-__all__ = ["controller", "modules", "utils", "PyAutomation"]
+__all__ = ["controller", "modules", "utils", "watchdog", "PyAutomation"]
 
 
 def with_active_trajectory(method: Callable[..., Any]) -> Callable[..., Any]:
@@ -66,14 +70,20 @@ class PyAutomation:
     pso_distance_input: PsoDistanceInput = field(compare=False)
     pso_window_input: PsoWindowInput = field(compare=False)
     pso_output_pin: PsoOutputPin = field(compare=False)
+    position_limits: tuple[float, float] | None = field(default=None, compare=False)
+    watchdog_task_index: int = field(default=2, compare=False)
+    reset_after_abort: bool = field(default=False, compare=False)
     verbose: bool = field(default=False, compare=False)
 
     _controller: controller.AerotechController = field(init=False, compare=False)
     _pso: modules.PSO = field(init=False, compare=False)
+    _watchdog: watchdog.AbortWatchdog = field(init=False, compare=False)
 
     _pre_trj_position: float = field(init=False, repr=False, compare=False)
     _active_trajectory: modules.Trajectory | None = field(init=False, repr=False, compare=False, default=None)
     _is_valid_trj: bool = field(init=False, repr=False, compare=False, default=False)
+    _is_running_trj: bool = field(init=False, repr=False, compare=False, default=False)
+    _abort_reason: str | None = field(init=False, repr=False, compare=False, default=None)
 
     def __post_init__(self) -> None:
         self._controller = controller.AerotechController(ip=self.ip, axis=self.axis, verbose=self.verbose)
@@ -84,47 +94,37 @@ class PyAutomation:
             pso_window_input=self.pso_window_input,
             pso_output_pin=self.pso_output_pin,
         )
+        self._watchdog = watchdog.AbortWatchdog(
+            controller=self._controller,
+            axis=self.axis[0],
+            pso=self._pso,
+            position_limits=self.position_limits,
+            execution_task_index=self.watchdog_task_index,
+            reset_after_abort=self.reset_after_abort,
+            verbose=self.verbose,
+        )
 
     def enable_controller(self) -> None:
-        """Connects and starts the Aerotech controller."""
+        """Connects and starts the Aerotech controller and the abort watchdog."""
         self._controller.connect()
         self._controller.start()
+        self._watchdog.start()
 
     def disable_controller(self) -> None:
-        """Disconnects the Aerotech controller."""
+        """Stops the abort watchdog and disconnects the Aerotech controller."""
+        self._watchdog.stop()
         self._controller.disconnect()
 
     @with_active_trajectory
     def _validate_direction(self) -> None:
         """Validates the trajectory direction."""
-        # Helper variables
-        start_position = self._active_trajectory.start_position
-        end_position = self._active_trajectory.end_position
-        direction = self._active_trajectory.travel_direction
-
-        if direction == 1:
-            # Positive direction
-            # Check if start position is less than end position
-            if start_position > end_position:
-                self._active_trajectory = None
-                utils.print_output("Trajectory direction is invalid!", verbose=self.verbose)
-                self._is_valid_trj = False
-                return
-        elif direction == -1:
-            # Negative direction
-            # Check if start position is greater than end position
-            if start_position < end_position:
-                self._active_trajectory = None
-                utils.print_output("Trajectory direction is invalid!", verbose=self.verbose)
-                self._is_valid_trj = False
-                return
+        if not self._active_trajectory.is_valid_direction:
+            self._active_trajectory = None
+            utils.print_output("Trajectory direction is invalid!", verbose=self.verbose)
+            self._is_valid_trj = False
+            return
         self._is_valid_trj = True
 
-    @with_active_trajectory
-    def _compute_taxi_distance(self) -> None:
-        """Computes the taxi distance for the trajectory."""
-        self._active_trajectory.taxi_distance = self._active_trajectory.distance / self._active_trajectory.number_of_pulses
-
     @with_active_trajectory
     def _prepare_pso(self) -> None:
         """Prepares the PSO for use."""
@@ -150,12 +150,21 @@ class PyAutomation:
             starting_position = self._pre_trj_position
 
         # Move to starting position
-        self._controller.move_linear(
-            axis=self.axis[0],
+        self._guarded_move_linear(
             distance=starting_position + (-self._active_trajectory.taxi_distance * self._active_trajectory.travel_direction),
             speed=self._active_trajectory.base_velocity,
         )
 
+    def _guarded_move_linear(self, distance: float, speed: float) -> bool:
+        """Moves the axis unless the trajectory is cancelled, returns False if it is."""
+        if not self._watchdog.begin_motion():
+            return False
+        try:
+            self._controller.move_linear(self.axis[0], distance=distance, speed=speed)
+        finally:
+            self._watchdog.end_motion()
+        return not self._watchdog.tripped
+
     @with_active_trajectory
     def _reset_axis(self) -> None:
         """Resets the axis to its previous state."""
@@ -164,18 +173,36 @@ class PyAutomation:
         # Revert axis to pre trajectory position
         current_position = self._controller.get_current_position(self.axis[0])
         if current_position > self._pre_trj_position:
-            self._controller.move_linear(
-                axis=self.axis[0],
+            self._guarded_move_linear(
                 distance=-abs(self._pre_trj_position - current_position),
                 speed=self._active_trajectory.base_velocity,
             )
         elif current_position < self._pre_trj_position:
-            self._controller.move_linear(
-                axis=self.axis[0],
+            self._guarded_move_linear(
                 distance=abs(current_position - self._pre_trj_position),
                 speed=self._active_trajectory.base_velocity,
             )
 
+    def _revert_axis(self) -> None:
+        """Resets the axis under the watchdog, redoing the reset after an abort that requests one."""
+        while True:
+            # Never move the axis back while an interlock is still violated
+            if not self._watchdog.interlocks_clear():
+                self._pso.disable_modules()
+                utils.print_output("Interlock violated, the axis is not reset!", verbose=self.verbose)
+                return
+
+            # The reset moves back to the pre trajectory position, possibly from outside the position limits
+            self._watchdog.arm(check_limits=False)
+            try:
+                self._reset_axis()
+            finally:
+                self._watchdog.disarm()
+
+            # Condition aborts leave the axis where it stopped, only abort_trajectory(reset=True) restarts the reset
+            if not (self._watchdog.tripped and self._watchdog.abort_requested and self._watchdog.reset_requested):
+                return
+
     def load_trajectory(self, trajectory: modules.Trajectory) -> None:
         """Loads a trajectory into the PSO."""
         # Set the active trajectory
@@ -185,34 +212,67 @@ class PyAutomation:
         self._validate_direction()
 
         if self._is_valid_trj:
-            # Calculate the taxi distance
-            self._compute_taxi_distance()
             # Prepare PSO modules
             self._prepare_pso()
 
-    def run_trajectory(self) -> None:
-        """Starts the trajectory."""
+    def run_trajectory(self, timeout: float | None = None) -> None:
+        """Starts the trajectory, aborting it if it runs longer than timeout seconds."""
         # Skip if there is no active valid trajectory
         if not self._is_valid_trj:
             return
 
-        # Move to starting position
-        self._move_to_starting_position()
-        # Enable PSO modules
-        self._pso.enable_modules()
-        # Start the trajectory
-        time.sleep(0.1)
-        total_distance = self._active_trajectory.distance + abs(self._active_trajectory.taxi_distance)
-        self._controller.move_linear(
-            self.axis[0],
-            distance=total_distance * self._active_trajectory.travel_direction,
-            speed=self._active_trajectory.velocity,
-        )
-        time.sleep(0.1)
-        # Revert axis to previous state
-        self._reset_axis()
-
-    def abort_trajectory(self) -> None:
-        """Aborts the trajectory."""
-        self._controller.abort_motion(self.axis[0])
-        self._reset_axis()
+        # Arm the watchdog for the duration of the trajectory
+        self._is_running_trj = True
+        self._abort_reason = None
+        self._watchdog.arm(timeout=timeout)
+        try:
+            try:
+                # Move to starting position
+                self._move_to_starting_position()
+                # Enable PSO modules, only while the trajectory is not cancelled
+                if not self._watchdog.tripped:
+                    self._pso.enable_modules()
+                    # Start the trajectory
+                    time.sleep(0.1)
+                    total_distance = self._active_trajectory.distance + abs(self._active_trajectory.taxi_distance)
+                    self._guarded_move_linear(
+                        distance=total_distance * self._active_trajectory.travel_direction,
+                        speed=self._active_trajectory.velocity,
+                    )
+                    time.sleep(0.1)
+            finally:
+                self._watchdog.disarm()
+
+            if self._watchdog.tripped:
+                self._abort_reason = self._watchdog.abort_reason
+                utils.print_output(f"Trajectory aborted: {self._abort_reason}.", verbose=self.verbose)
+                # The reset move is deferred to this thread and skipped if not requested
+                if not self._watchdog.reset_requested:
+                    # The abort may have landed before the PSO modules were enabled
+                    self._pso.disable_modules()
+                    return
+            # Revert axis to previous state
+            self._revert_axis()
+        finally:
+            self._is_running_trj = False
+
+    def abort_trajectory(self, reset: bool = True) -> None:
+        """Aborts the trajectory, the axis is reset to its previous state if reset is True."""
+        if self._watchdog.running and (self._is_running_trj or self._watchdog.armed):
+            # The thread running the trajectory performs the reset once the move returns
+            self._watchdog.request_abort(reason="Trajectory aborted by user", reset=reset)
+            return
+
+        self._controller.abort_motion(self.axis[0], execution_task_index=self.watchdog_task_index)
+        if reset:
+            self._revert_axis()
+        else:
+            self._pso.disable_modules()
+
+    @property
+    def watchdog(self) -> watchdog.AbortWatchdog:
+        return self._watchdog
+
+    @property
+    def abort_reason(self) -> str | None:
+        return self._abort_reason
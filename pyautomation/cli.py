@@ -0,0 +1,216 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------------------
+# Project: PyAutomation
+# File: cli.py
+# ----------------------------------------------------------------------------------
+# Purpose:
+# This file is used to define the pyautomation command line interface. Trajectory
+# files are JSON documents with a list of trajectories and, for the run command, the
+# controller configuration. The plan, validate and estimate commands never touch
+# the hardware, so the automation1 SDK is only imported by the run command.
+# ----------------------------------------------------------------------------------
+# Author: Christofanis Skordas
+#
+# Copyright (C) 2024 GSECARS, The University of Chicago, USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ----------------------------------------------------------------------------------
+
+import argparse
+import json
+import sys
+from typing import Any
+
+from pyautomation.modules import Trajectory
+
+
+def load_trajectory_file(path: str) -> dict[str, Any]:
+    """Loads a trajectory file."""
+    with open(path, encoding="utf-8") as file:
+        document = json.load(file)
+    if not isinstance(document, dict) or not isinstance(document.get("trajectories"), list):
+        raise ValueError(f"{path} does not define a list of trajectories!")
+    return document
+
+
+def _build_trajectories(document: dict[str, Any]) -> list[Trajectory]:
+    """Creates the trajectories of a trajectory file."""
+    return [Trajectory(**parameters) for parameters in document["trajectories"]]
+
+
+def _enum_member(enum: Any, name: str) -> Any:
+    """Returns the automation1 enum member with the given name."""
+    if not hasattr(enum, name):
+        raise ValueError(f"{name} is not a valid {enum.__name__}!")
+    return getattr(enum, name)
+
+
+def _validate(document: dict[str, Any]) -> list[str]:
+    """Returns the errors found in the trajectories of a trajectory file."""
+    errors = []
+    limits = document.get("controller", {}).get("position_limits")
+
+    for index, parameters in enumerate(document["trajectories"]):
+        try:
+            trajectory = Trajectory(**parameters)
+        except TypeError as e:
+            errors.append(f"Trajectory {index}: {e}")
+            continue
+        except ZeroDivisionError:
+            errors.append(f"Trajectory {index}: number of pulses and exposure must be positive.")
+            continue
+
+        if trajectory.number_of_pulses <= 0 or trajectory.exposure <= 0:
+            errors.append(f"Trajectory {index}: number of pulses and exposure must be positive.")
+        if trajectory.base_velocity <= 0:
+            errors.append(f"Trajectory {index}: base velocity must be positive.")
+        if trajectory.accel_time < 0:
+            errors.append(f"Trajectory {index}: acceleration time must not be negative.")
+        if trajectory.travel_direction not in (-1, 1):
+            errors.append(f"Trajectory {index}: travel direction must be 1 or -1.")
+        elif not trajectory.is_valid_direction:
+            errors.append(f"Trajectory {index}: trajectory direction is invalid.")
+        if trajectory.distance == 0:
+            errors.append(f"Trajectory {index}: start and end positions are the same.")
+        if limits is not None:
+            approach_position = trajectory.start_position - trajectory.taxi_distance * trajectory.travel_direction
+            for position in (approach_position, trajectory.end_position):
+                if not limits[0] <= position <= limits[1]:
+                    errors.append(f"Trajectory {index}: position {position} is outside of limits {limits}.")
+
+    return errors
+
+
+def _load_valid_trajectory_file(path: str) -> dict[str, Any] | None:
+    """Loads a trajectory file, prints its errors and returns None if it is invalid."""
+    document = load_trajectory_file(path)
+    errors = _validate(document)
+    for error in errors:
+        print(error, file=sys.stderr)
+    return None if errors else document
+
+
+def plan(args: argparse.Namespace) -> int:
+    """Prints the computed parameters of each trajectory."""
+    document = _load_valid_trajectory_file(args.file)
+    if document is None:
+        return 1
+    for index, trajectory in enumerate(_build_trajectories(document)):
+        print(f"Trajectory {index}:")
+        print(f"  start position:    {trajectory.start_position}")
+        print(f"  end position:      {trajectory.end_position}")
+        print(f"  travel direction:  {trajectory.travel_direction}")
+        print(f"  distance:          {trajectory.distance}")
+        print(f"  velocity:          {trajectory.velocity}")
+        print(f"  accel distance:    {trajectory.accel_distance}")
+        print(f"  taxi distance:     {trajectory.taxi_distance}")
+        print(f"  approach position: {trajectory.start_position - trajectory.taxi_distance * trajectory.travel_direction}")
+    return 0
+
+
+def validate(args: argparse.Namespace) -> int:
+    """Validates the trajectories, returns 1 if any of them is invalid."""
+    if _load_valid_trajectory_file(args.file) is None:
+        return 1
+    print(f"{args.file} is valid.")
+    return 0
+
+
+def estimate(args: argparse.Namespace) -> int:
+    """Prints the estimated scan and run duration of each trajectory."""
+    document = _load_valid_trajectory_file(args.file)
+    if document is None:
+        return 1
+    total = 0.0
+    for index, trajectory in enumerate(_build_trajectories(document)):
+        total += trajectory.run_duration
+        print(f"Trajectory {index}: scan {trajectory.scan_duration:.3f} s, run {trajectory.run_duration:.3f} s")
+    print(f"Total: {total:.3f} s")
+    return 0
+
+
+def run(args: argparse.Namespace) -> int:
+    """Runs the trajectories on the controller."""
+    document = _load_valid_trajectory_file(args.file)
+    if document is None:
+        return 1
+    if "controller" not in document:
+        print(f"{args.file} does not define a controller!", file=sys.stderr)
+        return 1
+
+    # Only the run command needs the automation1 SDK
+    from automation1 import PsoDistanceInput, PsoWindowInput, PsoOutputPin
+
+    from pyautomation import PyAutomation
+    from pyautomation.controller import AutomationAxis
+
+    config = document["controller"]
+    limits = config.get("position_limits")
+    pyautomation = PyAutomation(
+        ip=config["ip"],
+        axis=[AutomationAxis(**axis) for axis in config["axis"]],
+        pso_distance_input=_enum_member(PsoDistanceInput, config["pso_distance_input"]),
+        pso_window_input=_enum_member(PsoWindowInput, config["pso_window_input"]),
+        pso_output_pin=_enum_member(PsoOutputPin, config["pso_output_pin"]),
+        position_limits=None if limits is None else (limits[0], limits[1]),
+        verbose=args.verbose,
+    )
+
+    pyautomation.enable_controller()
+    try:
+        for trajectory in _build_trajectories(document):
+            pyautomation.load_trajectory(trajectory)
+            pyautomation.run_trajectory(timeout=args.timeout)
+            if pyautomation.abort_reason is not None:
+                print(f"Trajectory aborted: {pyautomation.abort_reason}.", file=sys.stderr)
+                return 1
+    finally:
+        pyautomation.disable_controller()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the pyautomation command."""
+    parser = argparse.ArgumentParser(prog="pyautomation", description="Plan, validate, estimate and run PSO trajectory files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, command, description in (
+        ("plan", plan, "print the computed parameters of each trajectory"),
+        ("validate", validate, "check the trajectories without a controller"),
+        ("estimate", estimate, "print the estimated scan duration of each trajectory"),
+        ("run", run, "run the trajectories on the controller"),
+    ):
+        subparser = subparsers.add_parser(name, help=description)
+        subparser.add_argument("file", help="trajectory file")
+        subparser.set_defaults(func=command)
+        if name == "run":
+            subparser.add_argument("--timeout", type=float, default=None, help="abort a trajectory running longer than this many seconds")
+            subparser.add_argument("-v", "--verbose", action="store_true", help="print the controller output")
+
+    args = parser.parse_args(argv)
+    try:
+        status: int = args.func(args)
+    except (OSError, ValueError) as e:
+        # Unreadable or malformed trajectory files, json.JSONDecodeError is a ValueError
+        print(f"Error: {e}", file=sys.stderr)
+        status = 1
+    except KeyError as e:
+        print(f"Error: missing {e} in the trajectory file!", file=sys.stderr)
+        status = 1
+    return status
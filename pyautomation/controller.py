@@ -32,14 +32,18 @@
 # SOFTWARE.
 # ----------------------------------------------------------------------------------
 
+from __future__ import annotations
+
 from dataclasses import dataclass, field
 from functools import wraps
-from typing import Any, Callable, cast, TypeVar
-
-from automation1 import AxisStatusItem, Controller, StatusItemConfiguration
+from typing import Any, Callable, cast, TypeVar, TYPE_CHECKING
 
 from pyautomation.utils import print_output
 
+if TYPE_CHECKING:
+    # The automation1 SDK is slow to import, it is only loaded once a controller is used
+    from automation1 import Controller
+
 
 MethodType = TypeVar("MethodType", bound=Callable[..., Any])
 
@@ -83,6 +87,8 @@ class AerotechController:
         if self._automation1:
             print_output(message="Already connected!", verbose=self.verbose)
         else:
+            from automation1 import Controller
+
             self._automation1 = Controller.connect(host=self.ip)
             print_output(
                 message=f"Connected to controller with IP of {self.ip}.",
@@ -110,16 +116,23 @@ class AerotechController:
     @requires_automation1_connection
     def get_current_position(self, axis: AutomationAxis) -> float:
         """Gets the current position of the axis."""
+        from automation1 import AxisStatusItem, StatusItemConfiguration
+
         item_config = StatusItemConfiguration()
         item_config.axis.add(AxisStatusItem.ProgramPosition, axis.name)
         current_position = float(self._automation1.runtime.status.get_status_items(item_config).axis.get(AxisStatusItem.ProgramPosition, axis.name).value)
         return round(current_position, 4)
 
     @requires_automation1_connection
-    def move_linear(self, axis: AutomationAxis, distance: float, speed: float) -> None:
-        """Moves the axis linearly."""
+    def move_linear(self, axis: AutomationAxis, distance: float, speed: float, execution_task_index: int = 1) -> None:
+        """Moves the axis linearly on the given execution task."""
         try:
-            self._automation1.runtime.commands.motion.move_linear(axes=axis.name, distances=[distance], coordinated_speed=speed)
+            self._automation1.runtime.commands.motion.move_linear(
+                axes=axis.name,
+                distances=[distance],
+                coordinated_speed=speed,
+                execution_task_index=execution_task_index,
+            )
         except Exception as e:
             print_output(
                 message=f"Failed to move axis {axis.name} {distance} units.",
@@ -132,9 +145,9 @@ class AerotechController:
         )
 
     @requires_automation1_connection
-    def abort_motion(self, axis: AutomationAxis) -> None:
-        """Aborts the motion of the axis."""
-        self._automation1.runtime.commands.motion.abort(axes=axis.name)
+    def abort_motion(self, axis: AutomationAxis, execution_task_index: int = 1) -> None:
+        """Aborts the motion of the axis, sending the command on the given execution task."""
+        self._automation1.runtime.commands.motion.abort(axes=axis.name, execution_task_index=execution_task_index)
         print_output(
             message=f"Aborted motion of axis {axis.name}.",
             verbose=self.verbose,
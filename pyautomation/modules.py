@@ -32,13 +32,18 @@
 # SOFTWARE.
 # ----------------------------------------------------------------------------------
 
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-
-from automation1 import PsoDistanceInput, PsoWindowInput, PsoWaveformMode, PsoOutputSource, PsoOutputPin
+from typing import TYPE_CHECKING
 
 from pyautomation.controller import AerotechController, AutomationAxis
 
+if TYPE_CHECKING:
+    # The automation1 SDK is slow to import, it is only loaded once a controller is used
+    from automation1 import PsoDistanceInput, PsoWindowInput, PsoOutputPin
+
 
 @dataclass
 class PsoModuleBase(ABC):
@@ -58,7 +63,7 @@ class PsoModuleBase(ABC):
         pass
 
     @abstractmethod
-    def disable(self) -> None:
+    def disable(self, execution_task_index: int = 1) -> None:
         """Disables the PSO module."""
         pass
 
@@ -91,12 +96,12 @@ class PsoDistance(PsoModuleBase):
         # Enables the PSO distance event module
         self.controller.automation1.runtime.commands.pso.pso_distance_events_on(axis=self.axis.name)
 
-    def disable(self) -> None:
+    def disable(self, execution_task_index: int = 1) -> None:
         """Disables the PSO module."""
         # Disable the PSO distance counter
-        self.controller.automation1.runtime.commands.pso.pso_distance_counter_off(axis=self.axis.name)
+        self.controller.automation1.runtime.commands.pso.pso_distance_counter_off(axis=self.axis.name, execution_task_index=execution_task_index)
         # Disable the PSO distance event module
-        self.controller.automation1.runtime.commands.pso.pso_distance_events_off(axis=self.axis.name)
+        self.controller.automation1.runtime.commands.pso.pso_distance_events_off(axis=self.axis.name, execution_task_index=execution_task_index)
 
 
 @dataclass
@@ -128,9 +133,13 @@ class PsoWindow(PsoModuleBase):
         # Configure the event mask to include the window output
         self.controller.automation1.runtime.commands.pso.pso_event_configure_mask(axis=self.axis.name, event_mask=0)
 
-    def disable(self) -> None:
+    def disable(self, execution_task_index: int = 1) -> None:
         # Disable the PSO window output
-        self.controller.automation1.runtime.commands.pso.pso_window_output_off(axis=self.axis.name, window_number=0)
+        self.controller.automation1.runtime.commands.pso.pso_window_output_off(
+            axis=self.axis.name,
+            window_number=0,
+            execution_task_index=execution_task_index,
+        )
 
 
 @dataclass
@@ -138,6 +147,8 @@ class PsoWaveform(PsoModuleBase):
     """PSO waveform module"""
 
     def prepare_module(self, exposure: float) -> None:
+        from automation1 import PsoWaveformMode
+
         # Configure the waveform module for pulse mode
         self.controller.automation1.runtime.commands.pso.pso_waveform_configure_mode(axis=self.axis.name, waveform_mode=PsoWaveformMode.Pulse)
         # Configure the PSO total time per fixed distance pulse in microseconds
@@ -159,9 +170,9 @@ class PsoWaveform(PsoModuleBase):
         """Enable the waveform module."""
         self.controller.automation1.runtime.commands.pso.pso_waveform_on(axis=self.axis.name)
 
-    def disable(self) -> None:
+    def disable(self, execution_task_index: int = 1) -> None:
         """Disable the waveform module."""
-        self.controller.automation1.runtime.commands.pso.pso_waveform_off(axis=self.axis.name)
+        self.controller.automation1.runtime.commands.pso.pso_waveform_off(axis=self.axis.name, execution_task_index=execution_task_index)
 
 
 @dataclass
@@ -172,6 +183,8 @@ class PsoOutput:
     axis: AutomationAxis = field(compare=False)
 
     def prepare_module(self, pso_output_pin: PsoOutputPin) -> None:
+        from automation1 import PsoOutputSource
+
         # Configure the waveform module as the PSO output
         self.controller.automation1.runtime.commands.pso.pso_output_configure_source(axis=self.axis.name, output_source=PsoOutputSource.Waveform)
         # Setup the physical output pin
@@ -223,11 +236,11 @@ class PSO:
         self._pso_window_module.enable()
         self._pso_waveform_module.enable()
 
-    def disable_modules(self) -> None:
-        """Disables the PSO modules."""
-        self._pso_distance_module.disable()
-        self._pso_window_module.disable()
-        self._pso_waveform_module.disable()
+    def disable_modules(self, execution_task_index: int = 1) -> None:
+        """Disables the PSO modules, sending the commands on the given execution task."""
+        self._pso_distance_module.disable(execution_task_index=execution_task_index)
+        self._pso_window_module.disable(execution_task_index=execution_task_index)
+        self._pso_waveform_module.disable(execution_task_index=execution_task_index)
 
 
 @dataclass
@@ -253,11 +266,36 @@ class Trajectory:
         self._velocity = self._distance / (self.exposure * self.number_of_pulses)
         # Calculate the acceleration distance
         self._accel_distance = self._compute_acceleration_distance()
+        # Calculate the taxi distance
+        self._taxi_distance = self._distance / self.number_of_pulses
 
     def _compute_acceleration_distance(self) -> float:
         """Computes the acceleration distance for the trajectory."""
         return self.accel_time / 2.0 * self._velocity
 
+    @property
+    def is_valid_direction(self) -> bool:
+        """Checks if the travel direction agrees with the start and end positions."""
+        if self.travel_direction == 1:
+            return self.start_position <= self.end_position
+        elif self.travel_direction == -1:
+            return self.start_position >= self.end_position
+        return True
+
+    @property
+    def scan_duration(self) -> float:
+        """Estimates the duration of the scan move, including the taxi distance and acceleration."""
+        return (self._distance + abs(self._taxi_distance)) / self._velocity + self.accel_time
+
+    @property
+    def run_duration(self) -> float:
+        """Estimates the duration of a run that starts and ends at the start position."""
+        # Approach move over the taxi distance and return move from the end position, both at base velocity
+        approach_duration = abs(self._taxi_distance) / self.base_velocity
+        return_duration = self._distance / self.base_velocity
+        # The two 0.1 s pauses around the scan move
+        return approach_duration + self.scan_duration + return_duration + 0.2
+
     @property
     def distance(self) -> float:
         return self._distance
@@ -0,0 +1,301 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------------------
+# Project: PyAutomation
+# File: watchdog.py
+# ----------------------------------------------------------------------------------
+# Purpose:
+# This file is used to define the AbortWatchdog class which runs on its own thread
+# next to the scan. The watchdog owns a command channel that accepts abort requests
+# from any thread and, while armed, polls the interlocks, the trajectory deadline
+# and the position limits. When one of them is violated the watchdog aborts the
+# motion of the axis and disables the PSO modules, recording the abort latency.
+# ----------------------------------------------------------------------------------
+# Author: Christofanis Skordas
+#
+# Copyright (C) 2024 GSECARS, The University of Chicago, USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ----------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, TYPE_CHECKING
+
+from pyautomation.utils import print_output
+
+if TYPE_CHECKING:
+    from pyautomation.controller import AerotechController, AutomationAxis
+    from pyautomation.modules import PSO
+
+
+# Commands accepted by the watchdog command channel
+_ABORT = "abort"
+_WAKE = "wake"
+_STOP = "stop"
+
+
+@dataclass
+class AbortWatchdog:
+    """Class to abort the motion of an axis from a dedicated thread.
+
+    A violated condition is detected at most poll_interval plus one status read after it
+    happens, and an abort request waits at most one status read in progress. The abort
+    latency is measured from the start of the poll that detects the violation, or from
+    the abort request, until abort_motion returns and the PSO modules are disabled. The
+    worst case is therefore poll_interval plus the status read and abort round trips.
+
+    Automation1 runs one command at a time per execution task, and the trajectory moves
+    block the default task 1. The watchdog sends its commands on execution_task_index,
+    which must be a different task enabled on the controller.
+    """
+
+    controller: AerotechController = field(compare=False)
+    axis: AutomationAxis = field(compare=False)
+    pso: PSO | None = field(default=None, compare=False)
+    poll_interval: float = field(default=0.005, compare=False)
+    max_abort_latency: float = field(default=0.05, compare=False)
+    execution_task_index: int = field(default=2, compare=False)
+    position_limits: tuple[float, float] | None = field(default=None, compare=False)
+    reset_after_abort: bool = field(default=False, compare=False)
+    verbose: bool = field(default=False, compare=False)
+
+    _interlocks: list[Callable[[], bool]] = field(init=False, repr=False, compare=False, default_factory=list)
+    _commands: queue.SimpleQueue[tuple[str, str, float, bool | None]] = field(init=False, repr=False, compare=False, default_factory=queue.SimpleQueue)
+    _thread: threading.Thread | None = field(init=False, repr=False, compare=False, default=None)
+    _armed: threading.Event = field(init=False, repr=False, compare=False, default_factory=threading.Event)
+    _tripped: threading.Event = field(init=False, repr=False, compare=False, default_factory=threading.Event)
+    _in_motion: threading.Event = field(init=False, repr=False, compare=False, default_factory=threading.Event)
+    _deadline: float | None = field(init=False, repr=False, compare=False, default=None)
+    _check_limits: bool = field(init=False, repr=False, compare=False, default=True)
+    _abort_reason: str | None = field(init=False, repr=False, compare=False, default=None)
+    _abort_latency: float | None = field(init=False, repr=False, compare=False, default=None)
+    _latency_exceeded: bool = field(init=False, repr=False, compare=False, default=False)
+    _reset_requested: bool = field(init=False, repr=False, compare=False, default=False)
+    _abort_requested: bool = field(init=False, repr=False, compare=False, default=False)
+
+    def add_interlock(self, interlock: Callable[[], bool]) -> None:
+        """Adds an interlock, a callable that returns True when it is violated."""
+        self._interlocks.append(interlock)
+
+    def start(self) -> None:
+        """Starts the watchdog thread."""
+        if self.running:
+            print_output(message="Watchdog is already running!", verbose=self.verbose)
+            return
+        self._thread = threading.Thread(target=self._run, name="pyautomation-watchdog", daemon=True)
+        self._thread.start()
+        print_output(message=f"Started the abort watchdog for axis {self.axis.name}.", verbose=self.verbose)
+
+    def stop(self) -> None:
+        """Stops the watchdog thread."""
+        if not self.running:
+            return
+        self._armed.clear()
+        self._commands.put((_STOP, "", time.perf_counter(), None))
+        self._thread.join()  # type: ignore
+        self._thread = None
+        print_output(message=f"Stopped the abort watchdog for axis {self.axis.name}.", verbose=self.verbose)
+
+    def arm(self, timeout: float | None = None, check_limits: bool = True) -> None:
+        """Arms the condition checks, optionally with a deadline in seconds from now."""
+        self._tripped.clear()
+        self._abort_reason = None
+        self._abort_latency = None
+        self._latency_exceeded = False
+        self._reset_requested = self.reset_after_abort
+        self._abort_requested = False
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._check_limits = check_limits
+        self._armed.set()
+        # The thread blocks on the command channel while disarmed
+        self._commands.put((_WAKE, "", time.perf_counter(), None))
+
+    def disarm(self) -> None:
+        """Disarms the condition checks, abort requests are still honoured."""
+        self._armed.clear()
+        self._deadline = None
+
+    def begin_motion(self) -> bool:
+        """Marks the start of a trajectory motion command, returns False if the trajectory is cancelled."""
+        # Set before checking the trip, so an abort landing in between is re-issued by the watchdog thread
+        self._in_motion.set()
+        if self._tripped.is_set():
+            self._in_motion.clear()
+            return False
+        return True
+
+    def end_motion(self) -> None:
+        """Marks the end of a trajectory motion command."""
+        self._in_motion.clear()
+
+    def interlocks_clear(self) -> bool:
+        """Checks that none of the interlocks is violated."""
+        return self._check_interlocks() is None
+
+    def request_abort(self, reason: str = "Abort requested", reset: bool | None = None) -> None:
+        """Requests an abort from any thread, optionally overriding reset_after_abort."""
+        self._commands.put((_ABORT, reason, time.perf_counter(), reset))
+
+    def _run(self) -> None:
+        """Main loop of the watchdog thread."""
+        while True:
+            try:
+                if self._poll():
+                    return
+            except Exception as e:
+                # The thread must not die while armed, an unexpected error aborts the trajectory
+                print_output(message=f"Watchdog error: {e}", verbose=self.verbose)
+                if self._armed.is_set():
+                    self._abort(reason=f"Watchdog error: {e}", requested_at=time.perf_counter(), reset=None, requested=False)
+
+    def _poll(self) -> bool:
+        """Handles one command or condition check, returns True when the watchdog is stopped."""
+        # Poll only while armed or while a motion command races an abort, otherwise wait for a command
+        racing = self._tripped.is_set() and self._in_motion.is_set()
+        timeout = self.poll_interval if self._armed.is_set() or racing else None
+        # Condition aborts are timed from the start of the poll, the status read included
+        polled_at = time.perf_counter()
+        try:
+            command, reason, requested_at, reset = self._commands.get(timeout=timeout)
+        except queue.Empty:
+            if self._tripped.is_set() and self._in_motion.is_set():
+                # A motion command raced the abort, keep aborting until it returns, the PSO modules are already disabled
+                try:
+                    self.controller.abort_motion(self.axis, execution_task_index=self.execution_task_index)
+                except Exception as e:
+                    print_output(message=f"Failed to abort axis {self.axis.name}: {e}", verbose=self.verbose)
+                return False
+            if not self._armed.is_set():
+                return False
+            violation = self._check_conditions()
+            if violation is not None:
+                self._abort(reason=violation, requested_at=polled_at, reset=None, requested=False)
+            return False
+
+        if command == _STOP:
+            return True
+        if command == _WAKE:
+            return False
+        self._abort(reason=reason, requested_at=requested_at, reset=reset, requested=True)
+        return False
+
+    def _check_conditions(self) -> str | None:
+        """Returns the reason of the first violated condition, None if there is none."""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            return "Trajectory deadline exceeded"
+
+        violation = self._check_interlocks()
+        if violation is not None:
+            return violation
+
+        if self.position_limits is not None and self._check_limits:
+            try:
+                position = self.controller.get_current_position(self.axis)
+            except Exception as e:
+                return f"Failed to read the position of axis {self.axis.name}: {e}"
+            if position is None:
+                return f"Failed to read the position of axis {self.axis.name}"
+            lower, upper = self.position_limits
+            if not lower <= position <= upper:
+                return f"Axis {self.axis.name} at {position} is outside of limits {self.position_limits}"
+
+        return None
+
+    def _check_interlocks(self) -> str | None:
+        """Returns the reason of the first violated interlock, None if there is none."""
+        for interlock in self._interlocks:
+            try:
+                if interlock():
+                    return f"Interlock {getattr(interlock, '__name__', interlock)} tripped"
+            except Exception as e:
+                return f"Interlock {getattr(interlock, '__name__', interlock)} failed: {e}"
+        return None
+
+    def _abort(self, reason: str, requested_at: float, reset: bool | None, requested: bool) -> None:
+        """Cancels the trajectory, aborts the motion and disables the PSO modules."""
+        self._armed.clear()
+        self._abort_reason = reason
+        self._reset_requested = self.reset_after_abort if reset is None else reset
+        self._abort_requested = requested
+        self._tripped.set()
+
+        self._abort_motion()
+        latency = time.perf_counter() - requested_at
+        self._abort_latency = latency
+        self._latency_exceeded = latency > self.max_abort_latency
+
+        print_output(
+            message=f"Watchdog aborted axis {self.axis.name} in {latency * 1000:.2f} ms: {reason}.",
+            verbose=self.verbose,
+        )
+        if self._latency_exceeded:
+            print_output(
+                message=f"Abort latency exceeded the {self.max_abort_latency * 1000:.2f} ms bound!",
+                verbose=self.verbose,
+            )
+
+    def _abort_motion(self) -> None:
+        """Aborts the motion of the axis and disables the PSO modules."""
+        try:
+            self.controller.abort_motion(self.axis, execution_task_index=self.execution_task_index)
+            if self.pso is not None:
+                self.pso.disable_modules(execution_task_index=self.execution_task_index)
+        except Exception as e:
+            print_output(message=f"Failed to abort axis {self.axis.name}.", verbose=self.verbose)
+            print_output(message=f"Error: {e}", verbose=self.verbose)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits for the watchdog to trip, returns True if it did."""
+        return self._tripped.wait(timeout=timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def armed(self) -> bool:
+        return self._armed.is_set()
+
+    @property
+    def tripped(self) -> bool:
+        return self._tripped.is_set()
+
+    @property
+    def abort_reason(self) -> str | None:
+        return self._abort_reason
+
+    @property
+    def abort_latency(self) -> float | None:
+        return self._abort_latency
+
+    @property
+    def latency_exceeded(self) -> bool:
+        return self._latency_exceeded
+
+    @property
+    def reset_requested(self) -> bool:
+        return self._reset_requested
+
+    @property
+    def abort_requested(self) -> bool:
+        return self._abort_requested
@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------------------
+# Project: PyAutomation
+# File: tests/conftest.py
+# ----------------------------------------------------------------------------------
+# Purpose:
+# This file is used to define the fake controller and PSO used by the tests. The
+# fake controller simulates linear moves on a single axis, can be aborted like the
+# Aerotech controller and records when each abort reached it, so the tests can run
+# without the automation1 SDK or any hardware.
+# ----------------------------------------------------------------------------------
+# Author: Christofanis Skordas
+#
+# Copyright (C) 2024 GSECARS, The University of Chicago, USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ----------------------------------------------------------------------------------
+
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from pyautomation import PyAutomation
+from pyautomation.controller import AutomationAxis
+from pyautomation.watchdog import AbortWatchdog
+
+
+class FakeController:
+    """Fake Aerotech controller that simulates linear moves and records aborts.
+
+    Like Automation1, each execution task runs one command at a time, so a command
+    sent on the task of a move in progress waits for the move to finish.
+    """
+
+    def __init__(self, time_step: float = 0.001) -> None:
+        self.time_step = time_step
+        self.position = 0.0
+        self.moves: list[float] = []
+        self.move_threads: list[threading.Thread] = []
+        self.abort_times: list[float] = []
+        self.fail_status_read = False
+        self._abort = threading.Event()
+        self._tasks: dict[int, threading.Lock] = {}
+
+    def task(self, execution_task_index: int) -> threading.Lock:
+        return self._tasks.setdefault(execution_task_index, threading.Lock())
+
+    def get_current_position(self, axis: AutomationAxis) -> float:
+        if self.fail_status_read:
+            raise ConnectionError("Status read failed")
+        return round(self.position, 4)
+
+    def move_linear(self, axis: AutomationAxis, distance: float, speed: float, execution_task_index: int = 1) -> None:
+        with self.task(execution_task_index):
+            # Like the controller, an abort only stops the motion in progress
+            self._abort.clear()
+            self.moves.append(distance)
+            self.move_threads.append(threading.current_thread())
+            step = speed * self.time_step * (1 if distance > 0 else -1)
+            target = self.position + distance
+            while abs(target - self.position) > abs(step):
+                if self._abort.wait(timeout=self.time_step):
+                    return
+                self.position += step
+            self.position = target
+
+    def abort_motion(self, axis: AutomationAxis, execution_task_index: int = 1) -> None:
+        with self.task(execution_task_index):
+            self.abort_times.append(time.perf_counter())
+            self._abort.set()
+
+
+class FakePSO:
+    """Fake PSO that records whether its modules are enabled."""
+
+    def __init__(self, controller: FakeController) -> None:
+        self.controller = controller
+        self.enabled = False
+        self.disable_calls = 0
+        self.on_enable: Any = None
+
+    def prepare_modules(self, **kwargs: Any) -> None:
+        pass
+
+    def enable_modules(self) -> None:
+        with self.controller.task(1):
+            self.enabled = True
+        if self.on_enable is not None:
+            self.on_enable()
+
+    def disable_modules(self, execution_task_index: int = 1) -> None:
+        with self.controller.task(execution_task_index):
+            self.enabled = False
+            self.disable_calls += 1
+
+
+@pytest.fixture
+def axis() -> AutomationAxis:
+    return AutomationAxis(name="Theta", counts_per_unit=1000.0)
+
+
+@pytest.fixture
+def fake_controller() -> FakeController:
+    return FakeController()
+
+
+@pytest.fixture
+def fake_pso(fake_controller: FakeController) -> FakePSO:
+    return FakePSO(controller=fake_controller)
+
+
+@pytest.fixture
+def watchdog(fake_controller: FakeController, fake_pso: FakePSO, axis: AutomationAxis) -> Iterator[AbortWatchdog]:
+    watchdog = AbortWatchdog(controller=fake_controller, axis=axis, pso=fake_pso, poll_interval=0.001)  # type: ignore
+    watchdog.start()
+    yield watchdog
+    watchdog.stop()
+
+
+@pytest.fixture
+def make_pyautomation(fake_controller: FakeController, fake_pso: FakePSO, axis: AutomationAxis) -> Iterator[Callable[..., PyAutomation]]:
+    created: list[PyAutomation] = []
+
+    def make(**kwargs: Any) -> PyAutomation:
+        pyautomation = PyAutomation(ip="127.0.0.1", axis=[axis], pso_distance_input=None, pso_window_input=None, pso_output_pin=None, **kwargs)  # type: ignore
+        # Swap the hardware for the fakes
+        pyautomation._controller = fake_controller  # type: ignore
+        pyautomation._pso = fake_pso  # type: ignore
+        pyautomation.watchdog.controller = fake_controller  # type: ignore
+        pyautomation.watchdog.pso = fake_pso  # type: ignore
+        pyautomation.watchdog.poll_interval = 0.001
+        pyautomation.watchdog.start()
+        created.append(pyautomation)
+        return pyautomation
+
+    yield make
+    for pyautomation in created:
+        pyautomation.watchdog.stop()
+
+
+@pytest.fixture
+def pyautomation(make_pyautomation: Callable[..., PyAutomation]) -> PyAutomation:
+    return make_pyautomation()
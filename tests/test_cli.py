@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------------------
+# Project: PyAutomation
+# File: tests/test_cli.py
+# ----------------------------------------------------------------------------------
+# Purpose:
+# This file is used to test the pyautomation command line interface and to keep the
+# cold start of the commands that do not use the hardware under its target.
+# ----------------------------------------------------------------------------------
+# Author: Christofanis Skordas
+#
+# Copyright (C) 2024 GSECARS, The University of Chicago, USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ----------------------------------------------------------------------------------
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from pyautomation.cli import main
+
+
+# Time allowed to import the command line interface in a fresh interpreter
+COLD_START_TARGET = 0.1
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run_python(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def test_import_does_not_load_automation1():
+    _run_python("import sys, pyautomation.cli; assert 'automation1' not in sys.modules, 'automation1 was imported'")
+
+
+def test_cold_start_target():
+    code = "import time; started = time.perf_counter(); import pyautomation.cli; print(time.perf_counter() - started)"
+    # Best of a few runs, the first one may also compile the bytecode
+    cold_start = min(float(_run_python(code)) for _ in range(3))
+    assert cold_start < COLD_START_TARGET, f"Cold start took {cold_start * 1000:.1f} ms"
+
+
+def _write_trajectory_file(tmp_path: Path, trajectories: list[dict[str, float]]) -> str:
+    path = tmp_path / "trajectories.json"
+    path.write_text(json.dumps({"trajectories": trajectories}), encoding="utf-8")
+    return str(path)
+
+
+def test_estimate(tmp_path, capsys):
+    path = _write_trajectory_file(
+        tmp_path, [{"start_position": 0, "end_position": 3.0, "exposure": 1, "number_of_pulses": 3, "travel_direction": 1, "base_velocity": 10.0}]
+    )
+
+    assert main(["estimate", path]) == 0
+    # Scan of 4 units at 1 unit/s plus 2 s acceleration, approach of 1 unit and return of 3 units at 10 units/s, two 0.1 s pauses
+    assert "scan 6.000 s, run 6.600 s" in capsys.readouterr().out
+
+
+def test_estimate_zero_distance(tmp_path, capsys):
+    path = _write_trajectory_file(tmp_path, [{"start_position": 1.0, "end_position": 1.0, "exposure": 1, "number_of_pulses": 3, "travel_direction": 1}])
+
+    assert main(["estimate", path]) == 1
+    assert "Trajectory 0: start and end positions are the same." in capsys.readouterr().err
+
+
+def test_validate_invalid_direction(tmp_path, capsys):
+    path = _write_trajectory_file(tmp_path, [{"start_position": 0, "end_position": 3.0, "exposure": 1, "number_of_pulses": 3, "travel_direction": -1}])
+
+    assert main(["validate", path]) == 1
+    assert "Trajectory 0: trajectory direction is invalid." in capsys.readouterr().err
+
+
+def test_validate_base_velocity_and_accel_time(tmp_path, capsys):
+    path = _write_trajectory_file(
+        tmp_path,
+        [{"start_position": 0, "end_position": 3.0, "exposure": 1, "number_of_pulses": 3, "travel_direction": 1, "base_velocity": 0, "accel_time": -1.0}],
+    )
+
+    assert main(["estimate", path]) == 1
+    errors = capsys.readouterr().err
+    assert "Trajectory 0: base velocity must be positive." in errors
+    assert "Trajectory 0: acceleration time must not be negative." in errors
+
+
+def test_malformed_trajectory_file(tmp_path, capsys):
+    path = tmp_path / "trajectories.json"
+    path.write_text("{", encoding="utf-8")
+
+    assert main(["validate", str(path)]) == 1
+    assert capsys.readouterr().err.startswith("Error: ")
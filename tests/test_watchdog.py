@@ -0,0 +1,326 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------------------
+# Project: PyAutomation
+# File: tests/test_watchdog.py
+# ----------------------------------------------------------------------------------
+# Purpose:
+# This file is used to test the AbortWatchdog class and the trajectory abort paths
+# of the PyAutomation class against the fake controller.
+# ----------------------------------------------------------------------------------
+# Author: Christofanis Skordas
+#
+# Copyright (C) 2024 GSECARS, The University of Chicago, USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ----------------------------------------------------------------------------------
+
+import queue
+import threading
+import time
+
+import pytest
+
+from pyautomation.modules import Trajectory
+from pyautomation.watchdog import AbortWatchdog
+
+
+def _wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the condition"
+        time.sleep(0.001)
+
+
+def test_request_abort(watchdog, fake_controller, fake_pso):
+    fake_pso.enabled = True
+    watchdog.arm()
+    watchdog.request_abort(reason="Test abort", reset=False)
+
+    assert watchdog.wait(timeout=1.0)
+    assert watchdog.abort_reason == "Test abort"
+    assert watchdog.reset_requested is False
+    assert watchdog.abort_latency is not None and not watchdog.latency_exceeded
+    assert len(fake_controller.abort_times) == 1
+    assert not fake_pso.enabled
+    assert not watchdog.armed
+
+
+def test_deadline(watchdog, fake_controller):
+    watchdog.arm(timeout=0.02)
+
+    assert watchdog.wait(timeout=1.0)
+    assert watchdog.abort_reason == "Trajectory deadline exceeded"
+    assert watchdog.reset_requested is False
+    assert watchdog.abort_latency is not None and not watchdog.latency_exceeded
+    assert fake_controller.abort_times
+
+
+def test_interlock(watchdog, fake_controller):
+    door_open = threading.Event()
+
+    def door_interlock():
+        return door_open.is_set()
+
+    watchdog.add_interlock(door_interlock)
+    watchdog.arm()
+    assert not watchdog.wait(timeout=0.02)
+
+    door_open.set()
+    assert watchdog.wait(timeout=1.0)
+    assert watchdog.abort_reason == "Interlock door_interlock tripped"
+    assert watchdog.abort_latency is not None and not watchdog.latency_exceeded
+    assert watchdog.reset_requested is False
+
+
+def test_position_limits(watchdog, fake_controller):
+    watchdog.position_limits = (-1.0, 1.0)
+    watchdog.arm()
+    move = threading.Thread(target=fake_controller.move_linear, args=(watchdog.axis, 5.0, 20.0))
+    move.start()
+
+    assert watchdog.wait(timeout=1.0)
+    move.join()
+    assert "outside of limits" in watchdog.abort_reason
+    assert watchdog.abort_latency is not None and not watchdog.latency_exceeded
+    assert fake_controller.position < 1.5
+
+
+def test_disarmed_watchdog_ignores_conditions(watchdog):
+    watchdog.position_limits = (-1.0, 1.0)
+    watchdog.arm(timeout=0.01)
+    watchdog.disarm()
+
+    assert not watchdog.wait(timeout=0.05)
+
+
+def test_motion_after_abort_is_cancelled(watchdog, fake_controller):
+    watchdog.arm()
+    watchdog.request_abort()
+    assert watchdog.wait(timeout=1.0)
+
+    assert not watchdog.begin_motion()
+
+
+def test_motion_racing_the_abort_is_aborted(watchdog, fake_controller, fake_pso):
+    watchdog.arm()
+    assert watchdog.begin_motion()
+    watchdog.request_abort()
+    assert watchdog.wait(timeout=1.0)
+
+    # The move reaches the controller after the abort, the watchdog aborts it again
+    fake_controller.move_linear(watchdog.axis, 10.0, 10.0)
+    watchdog.end_motion()
+    assert fake_controller.position < 1.0
+    # Only the motion is aborted again, the PSO modules were disabled once
+    assert len(fake_controller.abort_times) > 1
+    assert fake_pso.disable_calls == 1
+
+
+def test_abort_before_scan_move(pyautomation, fake_controller, fake_pso):
+    trajectory = Trajectory(start_position=0, end_position=3.0, exposure=0.1, number_of_pulses=3, travel_direction=1, base_velocity=100.0)
+    pyautomation.load_trajectory(trajectory)
+
+    # Abort after the approach move, while the PSO modules are being enabled
+    def abort():
+        pyautomation.abort_trajectory(reset=False)
+        pyautomation.watchdog.wait(timeout=1.0)
+
+    fake_pso.on_enable = abort
+    pyautomation.run_trajectory()
+
+    assert pyautomation.watchdog.tripped
+    assert fake_controller.moves == [-1.0]
+    assert fake_controller.position == -1.0
+    assert not fake_pso.enabled
+
+
+def test_failed_position_read(watchdog, fake_controller):
+    watchdog.position_limits = (-1.0, 1.0)
+    fake_controller.fail_status_read = True
+    watchdog.arm()
+
+    assert watchdog.wait(timeout=1.0)
+    assert watchdog.abort_reason.startswith("Failed to read the position of axis Theta")
+    assert watchdog.running
+
+
+def test_abort_while_idle_resets_in_place(pyautomation, fake_controller, fake_pso):
+    trajectory = Trajectory(start_position=0, end_position=3.0, exposure=0.1, number_of_pulses=3, travel_direction=1, base_velocity=100.0)
+    pyautomation.load_trajectory(trajectory)
+    pyautomation._pre_trj_position = 0.0
+    fake_controller.position = 2.0
+
+    pyautomation.abort_trajectory()
+
+    assert not pyautomation.watchdog.tripped
+    assert fake_controller.position == 0.0
+
+
+def test_arm_clears_reset_requested(watchdog):
+    watchdog.arm()
+    watchdog.request_abort(reset=True)
+    assert watchdog.wait(timeout=1.0)
+    assert watchdog.reset_requested is True
+
+    watchdog.arm()
+    assert watchdog.reset_requested is False
+
+
+def test_abort_on_the_scan_task_waits_for_the_move(watchdog, fake_controller):
+    # Sending the abort on the task running the move only lands once the move is done
+    watchdog.execution_task_index = 1
+    move = threading.Thread(target=fake_controller.move_linear, args=(watchdog.axis, 2.0, 20.0))
+    move.start()
+    _wait_for(lambda: fake_controller.moves)
+    watchdog.request_abort()
+
+    assert watchdog.wait(timeout=1.0)
+    move.join()
+    assert fake_controller.position == 2.0
+    assert watchdog.latency_exceeded
+
+
+def test_abort_on_the_watchdog_task_stops_the_move(watchdog, fake_controller):
+    move = threading.Thread(target=fake_controller.move_linear, args=(watchdog.axis, 2.0, 20.0))
+    move.start()
+    _wait_for(lambda: fake_controller.moves)
+    watchdog.request_abort()
+
+    assert watchdog.wait(timeout=1.0)
+    move.join()
+    assert fake_controller.position < 1.0
+    assert not watchdog.latency_exceeded
+
+
+def test_no_reset_while_interlock_is_violated(pyautomation, fake_controller, fake_pso):
+    pyautomation.watchdog.reset_after_abort = True
+    door_open = threading.Event()
+    pyautomation.watchdog.add_interlock(door_open.is_set)
+    trajectory = Trajectory(start_position=0, end_position=3.0, exposure=0.1, number_of_pulses=3, travel_direction=1, base_velocity=100.0)
+    pyautomation.load_trajectory(trajectory)
+
+    fake_pso.on_enable = door_open.set
+    pyautomation.run_trajectory()
+
+    assert pyautomation.watchdog.abort_reason == "Interlock is_set tripped"
+    assert pyautomation.watchdog.reset_requested is True
+    # The scan was cancelled and the axis was not moved back while the door is open
+    assert fake_controller.moves == [-1.0]
+    assert fake_controller.position == -1.0
+    assert not fake_pso.enabled
+
+
+def test_abort_during_reset_redoes_the_reset(pyautomation, fake_controller, fake_pso):
+    trajectory = Trajectory(start_position=0, end_position=3.0, exposure=0.1, number_of_pulses=3, travel_direction=1, base_velocity=10.0)
+    pyautomation.load_trajectory(trajectory)
+    run = threading.Thread(target=pyautomation.run_trajectory)
+    run.start()
+
+    # Abort while the axis moves back from the end position
+    _wait_for(lambda: len(fake_controller.moves) == 3)
+    pyautomation.abort_trajectory()
+    run.join()
+
+    assert pyautomation.abort_reason is None
+    assert len(fake_controller.moves) == 4
+    assert fake_controller.position == pytest.approx(0.0)
+    assert not fake_pso.enabled
+
+
+def _scan_trajectory():
+    # Approach of 1 unit at 100 units/s, then a scan of 4 units at 10 units/s
+    return Trajectory(start_position=0, end_position=3.0, exposure=0.1, number_of_pulses=3, travel_direction=1, base_velocity=100.0)
+
+
+def test_run_trajectory_deadline(pyautomation, fake_controller, fake_pso):
+    pyautomation.load_trajectory(_scan_trajectory())
+    pyautomation.run_trajectory(timeout=0.2)
+
+    # The scan is aborted and the axis is left where it stopped
+    assert pyautomation.abort_reason == "Trajectory deadline exceeded"
+    assert len(fake_controller.moves) == 2
+    assert -1.0 < fake_controller.position < 3.0
+    assert not fake_pso.enabled
+
+
+def test_run_trajectory_deadline_with_reset(make_pyautomation, fake_controller, fake_pso):
+    pyautomation = make_pyautomation(reset_after_abort=True)
+    pyautomation.load_trajectory(_scan_trajectory())
+    pyautomation.run_trajectory(timeout=0.2)
+
+    assert pyautomation.abort_reason == "Trajectory deadline exceeded"
+    # The reset move ran on the thread running the trajectory
+    assert len(fake_controller.moves) == 3
+    assert fake_controller.move_threads[-1] is threading.current_thread()
+    assert fake_controller.position == pytest.approx(0.0)
+    assert not fake_pso.enabled
+
+
+def test_run_trajectory_position_limit_with_reset(make_pyautomation, fake_controller, fake_pso):
+    pyautomation = make_pyautomation(position_limits=(-2.0, 1.0), reset_after_abort=True)
+    pyautomation.load_trajectory(_scan_trajectory())
+    pyautomation.run_trajectory()
+
+    assert "outside of limits" in pyautomation.abort_reason
+    assert fake_controller.move_threads[-1] is threading.current_thread()
+    assert fake_controller.position == pytest.approx(0.0)
+    assert not fake_pso.enabled
+
+
+def test_user_abort_during_scan_resets(pyautomation, fake_controller, fake_pso):
+    pyautomation.load_trajectory(_scan_trajectory())
+    run = threading.Thread(target=pyautomation.run_trajectory)
+    run.start()
+
+    _wait_for(lambda: len(fake_controller.moves) == 2 and fake_controller.position > 0.5)
+    pyautomation.abort_trajectory()
+    run.join()
+
+    assert pyautomation.abort_reason == "Trajectory aborted by user"
+    assert fake_controller.move_threads[-1] is run
+    assert len(fake_controller.moves) == 3
+    assert fake_controller.position == pytest.approx(0.0)
+    assert not fake_pso.enabled
+
+
+class CountingQueue(queue.SimpleQueue):
+    """Command channel that counts how often the watchdog thread waits on it."""
+
+    def __init__(self):
+        self.gets = 0
+
+    def get(self, block=True, timeout=None):
+        self.gets += 1
+        return super().get(block=block, timeout=timeout)
+
+
+def test_disarmed_watchdog_waits_for_commands(fake_controller, fake_pso, axis):
+    watchdog = AbortWatchdog(controller=fake_controller, axis=axis, pso=fake_pso, poll_interval=0.001)
+    watchdog._commands = CountingQueue()
+    watchdog.start()
+    time.sleep(0.05)
+    idle_gets = watchdog._commands.gets
+
+    watchdog.arm()
+    time.sleep(0.05)
+    armed_gets = watchdog._commands.gets - idle_gets
+    watchdog.stop()
+
+    assert idle_gets == 1
+    assert armed_gets > 10